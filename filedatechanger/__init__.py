@@ -0,0 +1,10 @@
+"""
+Fix the dates of pictures and videos.
+
+Single engine behind the 'filedatechange.py', 'moddate2exif.py' and
+'img_date_normalizer.py' scripts. Run it with:
+
+    python -m filedatechanger filename <path>    # name/EXIF/JSON -> modification date
+    python -m filedatechanger exif <path>        # modification date -> EXIF
+    python -m filedatechanger normalize <path>   # best date -> EXIF and modification date
+"""
@@ -0,0 +1,174 @@
+import os
+import json
+import time
+
+from logger.logger_manager import Logger
+from .engine import Result, process_file, complete_file
+from .inference import DateInference
+from .catalog import result_to_row
+from .scheduler import DeviceScheduler, locate, sort_by_device
+from .profiling import span
+
+logger = Logger("FDCHANG")
+
+# size of the blocks read when the paths are NUL separated
+READ_SIZE = 64 * 1024
+
+
+def read_paths(stream, null: bool = False):
+    """
+    Read file paths from a text stream, one at a time.
+
+    Args:
+        stream: The open stream, e.g. sys.stdin or a manifest file.
+        null (bool): Paths are separated by NUL characters, as written by
+            'find -print0' or 'fd -0', instead of new lines.
+
+    Yields:
+        str: Each non empty path, without its separator.
+    """
+    if not null:
+        for line in stream:
+            path = line.rstrip('\r\n')
+            if path:
+                yield path
+        return
+
+    # only the last incomplete path is kept between blocks
+    pending = ''
+    while True:
+        block = stream.read(READ_SIZE)
+        if not block:
+            break
+        *paths, pending = (pending + block).split('\0')
+        for path in paths:
+            if path:
+                yield path
+    if pending.strip('\r\n'):
+        yield pending.rstrip('\r\n')
+
+
+def result_status(result: Result) -> str:
+    """Summarize a result in one word."""
+    if result.skipped:
+        return 'skipped'
+    if result.error:
+        return 'failed'
+    if result.date is None:
+        return 'unresolved'
+    if result.mtime_written or result.exif_written:
+        return 'updated'
+    return 'failed'
+
+
+def result_to_dict(result: Result) -> dict:
+    return {
+        'path': result.path,
+        'status': result_status(result),
+        'date': result.date.strftime("%Y-%m-%d %H:%M:%S") if result.date else None,
+        'source': result.source,
+        'exif_written': result.exif_written,
+        'mtime_written': result.mtime_written,
+        'confidence': result.confidence,
+        'error': result.error,
+    }
+
+
+def write_result(output, result: Result) -> None:
+    """Write a result as one JSON line, flushed so consumers see it at once."""
+    output.write(json.dumps(result_to_dict(result)) + '\n')
+    output.flush()
+
+
+def process_paths(paths, job, output=None, pbar=None, catalog=None, scheduler=None) -> int:
+    """
+    Process a stream of file paths in this process.
+
+    The paths are consumed one by one, so memory use does not grow with
+    the length of the list. When the job infers dates, the files that need
+    it are kept aside and finished once all the paths have been seen.
+
+    Args:
+        paths: Iterable of file paths.
+        job (Job): The operations to apply to each file.
+        output: Optional text stream receiving one JSON line per file.
+        pbar: Optional progress counter updated for each file.
+        catalog: Optional catalog receiving one row per file.
+        scheduler (DeviceScheduler): When given, the paths are grouped by
+            device and sorted by inode, a window at a time, and processed
+            by the workers of their device. Otherwise they are processed
+            in order in this thread.
+
+    Returns:
+        int: The number of files that could not be resolved or updated.
+    """
+    if scheduler is None:
+        files = ((path, None, None) for path in paths)
+    else:
+        files = sort_by_device(locate(paths))
+    return process_files(files, job, output, pbar, catalog, scheduler)
+
+
+def process_files(files, job, output=None, pbar=None, catalog=None, scheduler=None) -> int:
+    """
+    Same as process_paths, for files already located and sorted.
+
+    Args:
+        files: Iterable of (path, device, inode), as given by
+            scheduler.scan_directory or scheduler.sort_by_device.
+    """
+    if scheduler is None:
+        # a single worker: the files are processed in order in this thread
+        scheduler = DeviceScheduler(1, 1)
+    inference = DateInference(job.min_confidence) if job.infers else None
+    deferred = []
+    failures = 0
+
+    def finish(result):
+        nonlocal failures
+        status = result_status(result)
+        if status in ('unresolved', 'failed'):
+            failures += 1
+        if output is not None:
+            write_result(output, result)
+        if catalog is not None:
+            catalog.add(result_to_row(result, status))
+
+    def handle(path):
+        # runs in the workers of the scheduler
+        with span(os.path.basename(path), 'file', path=path):
+            return _handle(path)
+
+    def _handle(path):
+        start = time.perf_counter()
+        if os.path.isdir(path):
+            logger.info(f"Skipping directory: {path}")
+            result = Result(path, skipped=True)
+        elif not os.path.isfile(path):
+            logger.warning(f"File '{path}' does not exist.")
+            result = Result(path, error='file not found')
+        else:
+            logger.info(f"Processing file: {path}")
+            result = process_file(path, job, inference)
+        result.duration = time.perf_counter() - start
+        return result
+
+    for result in scheduler.run(files, handle):
+        if pbar is not None:
+            pbar.update()
+        if result.deferred:
+            deferred.append(result)
+        else:
+            finish(result)
+
+    if inference is not None:
+        inference.ready = True
+        if deferred:
+            logger.info(f"Inferring the dates of {len(deferred)} files from their neighbours.")
+        for result in deferred:
+            start = time.perf_counter()
+            with span(os.path.basename(result.path), 'file', path=result.path, inferred=True):
+                completed = complete_file(result, job, inference)
+            completed.duration = result.duration + time.perf_counter() - start
+            finish(completed)
+    return failures
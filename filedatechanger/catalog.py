@@ -0,0 +1,177 @@
+"""
+Catalog of the dates given to each file during a run.
+
+The catalog is written as Parquet or CSV, following the '.parquet' or
+'.csv' extension of its path. For other extensions Parquet is used when
+pyarrow is installed, and CSV otherwise. Rows are buffered and written in chunks while the run goes on,
+each chunk being a Parquet row group.
+"""
+
+import os
+import csv
+import importlib.util
+from datetime import datetime
+
+from logger.logger_manager import Logger
+from .engine import Result
+
+logger = Logger("FDCHANG")
+
+CATALOG_COLUMNS = (
+    'path',
+    'size',
+    'old_mtime',
+    'new_mtime',
+    'exif_date_original',
+    'exif_date_digitized',
+    'exif_datetime',
+    'source',
+    'confidence',
+    'status',
+    'duration',
+)
+
+# EXIF tags copied to the catalog, by column
+EXIF_COLUMNS = {
+    'exif_date_original': 'DateTimeOriginal',
+    'exif_date_digitized': 'DateTimeDigitized',
+    'exif_datetime': 'DateTime',
+}
+
+CATALOG_FORMATS = ('auto', 'parquet', 'csv')
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def result_to_row(result: Result, status: str) -> dict:
+    """Build the catalog row of a result, using only what was already read."""
+    info = result.info
+    stat = None
+    if info is not None:
+        try:
+            # cached before the file was updated
+            stat = info.stat
+        except OSError:
+            pass
+    exif_tags = info.exif_tags if info is not None and info.exif_loaded else {}
+
+    row = {
+        'path': result.path,
+        'size': stat.st_size if stat is not None else None,
+        'old_mtime': datetime.fromtimestamp(stat.st_mtime) if stat is not None else None,
+        'new_mtime': result.date if result.mtime_written else None,
+        'source': result.source,
+        'confidence': result.confidence,
+        'status': status,
+        'duration': result.duration,
+    }
+    for column, tag in EXIF_COLUMNS.items():
+        value = exif_tags.get(tag)
+        row[column] = value if isinstance(value, str) else None
+    return row
+
+
+class CsvCatalog:
+    """Catalog written as CSV, one line per file."""
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._rows = []
+        # file names that are not valid UTF-8 arrive as surrogate escaped
+        # strings, they are written back as their original bytes
+        self._file = open(path, 'w', newline='', errors='surrogateescape')
+        self._writer = csv.DictWriter(self._file, fieldnames=CATALOG_COLUMNS)
+        self._writer.writeheader()
+
+    def add(self, row: dict) -> None:
+        self._rows.append(row)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        self._writer.writerows(self._rows)
+        self._file.flush()
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+
+
+class ParquetCatalog:
+    """Catalog written as Parquet, one row group per chunk."""
+
+    def __init__(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self.path = path
+        self.chunk_size = chunk_size
+        self._rows = []
+        # the source and status columns take a few values only, they are
+        # stored as dictionaries
+        enum = pa.dictionary(pa.int8(), pa.string())
+        self._schema = pa.schema([
+            ('path', pa.string()),
+            ('size', pa.int64()),
+            ('old_mtime', pa.timestamp('s')),
+            ('new_mtime', pa.timestamp('s')),
+            ('exif_date_original', pa.string()),
+            ('exif_date_digitized', pa.string()),
+            ('exif_datetime', pa.string()),
+            ('source', enum),
+            ('confidence', pa.float32()),
+            ('status', enum),
+            ('duration', pa.float32()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema, compression='zstd')
+
+    def add(self, row: dict) -> None:
+        # Parquet strings must be valid UTF-8: the bytes of file names that
+        # are not are written as \xNN escapes
+        row['path'] = os.fsencode(row['path']).decode('utf-8', 'backslashreplace')
+        self._rows.append(row)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._rows:
+            return
+        table = self._pa.Table.from_pylist(self._rows, schema=self._schema)
+        self._writer.write_table(table)
+        self._rows = []
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+
+
+def open_catalog(path: str, catalog_format: str = 'auto', chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Open a catalog for writing.
+
+    Args:
+        path (str): The file to write.
+        catalog_format (str): 'parquet', 'csv' or 'auto' to follow the
+            '.parquet' or '.csv' extension of the path, and for other
+            extensions use Parquet when pyarrow is installed.
+        chunk_size (int): Number of rows written at once.
+
+    Returns:
+        The catalog, with add(row) and close() methods.
+    """
+    has_pyarrow = importlib.util.find_spec('pyarrow') is not None
+    if catalog_format == 'auto':
+        extension = os.path.splitext(path)[1].lower()
+        if extension == '.parquet':
+            catalog_format = 'parquet'
+        elif extension == '.csv':
+            catalog_format = 'csv'
+        else:
+            catalog_format = 'parquet' if has_pyarrow else 'csv'
+    if catalog_format == 'parquet':
+        if not has_pyarrow:
+            raise ValueError("pyarrow is required to write a Parquet catalog")
+        return ParquetCatalog(path, chunk_size)
+    return CsvCatalog(path, chunk_size)
@@ -0,0 +1,262 @@
+import io
+import os
+import sys
+import argparse
+from datetime import datetime
+
+from logger.logger_manager import Logger, set_log_stream
+from .engine import filename_job, exif_job, normalize_job
+from .batch import read_paths, process_paths, process_files
+from .scheduler import DeviceScheduler, scan_directory, DEFAULT_WORKERS, DEFAULT_ROTATIONAL_WORKERS
+from .catalog import CATALOG_FORMATS, open_catalog
+from .inference import DEFAULT_MIN_CONFIDENCE
+from .profiling import Profiler, span
+
+logger = Logger("FDCHANG")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # options shared by all the modes
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('path', type=str, nargs='?', help='Path to the file or directory')
+    sources = common.add_mutually_exclusive_group()
+    sources.add_argument('--from-stdin', action='store_true',
+                         help='Read the paths of the files to process from the standard input')
+    sources.add_argument('--manifest', type=str, help='Read the paths of the files to process from this file')
+    common.add_argument('-0', '--null', action='store_true',
+                        help='Paths read with --from-stdin or --manifest are NUL separated')
+    common.add_argument('--results', type=str,
+                        help='Write one JSON line per processed file to this file, - for the standard '
+                             'output (the log messages then go to the standard error)')
+    common.add_argument('--catalog', type=str,
+                        help='Write the date given to each file, and where it came from, to this file')
+    common.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='Files processed at the same time on each SSD (default the number of CPUs)')
+    common.add_argument('--hdd-workers', type=int, default=DEFAULT_ROTATIONAL_WORKERS,
+                        help='Files processed at the same time on each rotational disk, and on devices of '
+                             'unknown type such as network shares '
+                             f'(default {DEFAULT_ROTATIONAL_WORKERS}). With a single worker on every '
+                             'device, paths read with --from-stdin or --manifest are processed as they '
+                             'come instead of being sorted by inode')
+    common.add_argument('--profile', type=str, metavar='PREFIX',
+                        help='Profile the run, writing PREFIX.pstats and PREFIX.folded collapsed stacks. '
+                             'The files are then processed one at a time')
+    common.add_argument('--trace', type=str,
+                        help='Write a Chrome trace event JSON file with one span per file and per stage, '
+                             'for Perfetto')
+    common.add_argument('--catalog-format', choices=CATALOG_FORMATS, default='auto',
+                        help='Format of the catalog, auto follows a .csv or .parquet extension, and otherwise '
+                             'uses Parquet when pyarrow is installed and CSV otherwise')
+
+    parser = argparse.ArgumentParser(
+                    prog='filedatechanger',
+                    description='Fix the dates of pictures and videos using their EXIF data, '
+                                'associated JSON files, file names and modification dates.')
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    filename_parser = subparsers.add_parser(
+        'filename', parents=[common],
+        help='Set the modification date from the EXIF data, JSON file or file name')
+    filename_parser.add_argument('-i', '--infer', action='store_true',
+                                 help='Infer missing dates from sequence numbered neighbours, e.g. DSC_0412 '
+                                      'from DSC_0411 and DSC_0413')
+    filename_parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE,
+                                 help='Lowest confidence, between 0 and 1, of an inferred date '
+                                      f'(default {DEFAULT_MIN_CONFIDENCE})')
+
+    subparsers.add_parser(
+        'exif', parents=[common],
+        help='Copy the modification date of JPG files into their EXIF data')
+
+    normalize_parser = subparsers.add_parser(
+        'normalize', parents=[common],
+        help='Set both the EXIF date and the modification date of JPG files')
+    normalize_parser.add_argument('-d', '--date', type=str, help='Date and time to set for the file')
+    normalize_parser.add_argument('-f', '--filenamedate', action='store_true', help='Use date from filename')
+    normalize_parser.add_argument('-m', '--modificationdate', action='store_true', help='Use file modification date')
+    normalize_parser.add_argument('-j', '--jsondate', action='store_true', help='Use date from associated JSON file')
+    normalize_parser.add_argument('-i', '--infer', action='store_true',
+                                  help='Infer missing dates from sequence numbered neighbours before '
+                                       'using the file modification date')
+    normalize_parser.add_argument('--min-confidence', type=float, default=DEFAULT_MIN_CONFIDENCE,
+                                  help='Lowest confidence, between 0 and 1, of an inferred date, below it '
+                                       f'the file modification date is used (default {DEFAULT_MIN_CONFIDENCE})')
+
+    return parser
+
+
+def build_job(args):
+    """Build the job of the selected mode from the command line arguments."""
+    if args.mode == 'filename':
+        return filename_job(args.infer, args.min_confidence)
+    if args.mode == 'exif':
+        return exif_job()
+
+    provided_date = None
+    if args.date:
+        try:
+            # parse the date string to datetime object
+            provided_date = datetime.strptime(args.date, "%Y-%m-%d %H:%M:%S")
+        except ValueError as e:
+            logger.error(f"Invalid date format: {e}")
+            return None
+        logger.info(f"Date provided: {provided_date}. It is going to be used for all files.")
+    elif args.jsondate:
+        logger.info("Forcing the use of date from JSON file.")
+    elif args.filenamedate:
+        logger.info("Forcing the use of date from filename.")
+    elif args.modificationdate:
+        logger.info("Forcing the use of file modification date.")
+    return normalize_job(provided_date, args.jsondate, args.filenamedate, args.modificationdate, args.infer,
+                         args.min_confidence)
+
+
+def create_progress_bar(total: int):
+    # enlighten is slow to import, only load it when a bar is shown
+    import enlighten
+
+    manager = enlighten.get_manager()
+    manager.status_bar('Processing EXIF dates',
+                       color='bold_underline_bright_white_on_lightslategray',
+                       justify=enlighten.Justify.CENTER)
+    std_bar_format = u'{desc}{desc_pad}{percentage:3.0f}%|{bar}| ' + \
+             u'{count:{len_total}d}/{total:d} ' + \
+             u'[{elapsed}<{eta}, {rate:.2f}{unit_pad}{unit}/s]'
+    return manager.counter(total=total, desc='Progress', unit='files', color='green', bar_format=std_bar_format)
+
+
+def process_directory(directory: str, job, progress: bool, output=None, catalog=None, scheduler=None) -> int:
+    """Process all the files of a directory, in inode order. Returns the exit code."""
+    logger.info(f"'{directory}' is a directory.")
+    with span('scan', path=directory):
+        files = scan_directory(directory)
+    pbar = create_progress_bar(len(files)) if progress else None
+
+    failures = process_files(files, job, output, pbar, catalog, scheduler)
+    if failures:
+        logger.warning(f"{failures} files could not be updated.")
+    return 0
+
+
+def process_path_list(args, job, output=None, catalog=None, scheduler=None) -> int:
+    """Process the files listed in the standard input or a manifest. Returns the exit code."""
+    if args.from_stdin:
+        # same decoding as the manifest, whatever the locale: sys.stdin is
+        # strict under UTF-8 locales and translates '\r' in file names
+        stdin = io.TextIOWrapper(sys.stdin.buffer, errors='surrogateescape', newline='')
+        try:
+            failures = process_paths(read_paths(stdin, args.null), job, output, catalog=catalog, scheduler=scheduler)
+        finally:
+            # sys.stdin keeps owning the buffer
+            stdin.detach()
+    else:
+        try:
+            # file names are not always valid in the locale encoding, keep
+            # their bytes as surrogates like sys.stdin and os.listdir do
+            manifest = open(args.manifest, 'r', newline='', errors='surrogateescape')
+        except OSError as e:
+            logger.error(f"Error opening manifest '{args.manifest}': {e}")
+            return 1
+        with manifest:
+            failures = process_paths(read_paths(manifest, args.null), job, output, catalog=catalog, scheduler=scheduler)
+    if failures:
+        logger.warning(f"{failures} files could not be updated.")
+    return 0
+
+
+def open_results(path: str):
+    """Open the results stream, line buffered so every result is seen at once."""
+    if path is None:
+        return None
+    if path == '-':
+        return sys.stdout
+    return open(path, 'w', buffering=1)
+
+
+def main(argv=None) -> int:
+    """Main function to process files or directories."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    # the standard output is kept for the results stream
+    if args.results == '-':
+        set_log_stream(sys.stderr)
+
+    batch = args.from_stdin or args.manifest is not None
+    if batch == (args.path is not None):
+        parser.error("give either a path or one of --from-stdin and --manifest")
+
+    # check if the file exists
+    if not batch and not os.path.exists(args.path):
+        logger.error(f"File not found: {args.path}")
+        return 1
+
+    job = build_job(args)
+    if job is None:
+        return 1
+
+    try:
+        output = open_results(args.results)
+    except OSError as e:
+        logger.error(f"Error opening results file '{args.results}': {e}")
+        return 1
+
+    catalog = None
+    if args.catalog is not None:
+        try:
+            catalog = open_catalog(args.catalog, args.catalog_format)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error opening catalog '{args.catalog}': {e}")
+            if output not in (None, sys.stdout):
+                output.close()
+            return 1
+
+    if args.profile:
+        # cProfile only sees the main thread, the files have to be processed there
+        logger.info("Profiling: the files are processed one at a time, ignoring --workers and --hdd-workers.")
+        scheduler = DeviceScheduler(1, 1)
+    else:
+        scheduler = DeviceScheduler(args.workers, args.hdd_workers)
+
+    profiler = None
+    if args.profile or args.trace:
+        profiler = Profiler(args.profile, args.trace)
+        try:
+            profiler.start()
+        except OSError as e:
+            logger.error(f"Error starting the profiler: {e}")
+            if output not in (None, sys.stdout):
+                output.close()
+            if catalog is not None:
+                catalog.close()
+            return 1
+
+    try:
+        if batch:
+            # with a single worker the paths are processed as they come,
+            # sorting them would only delay the results
+            return process_path_list(args, job, output, catalog,
+                                     scheduler if scheduler.concurrent else None)
+
+        if os.path.isdir(args.path):
+            # the progress bar is only shown by the modes rewriting EXIF data,
+            # the slow ones
+            return process_directory(args.path, job, progress=job.set_exif, output=output,
+                                     catalog=catalog, scheduler=scheduler)
+
+        failures = process_paths([args.path], job, output, catalog=catalog)
+        if failures:
+            logger.error(f"Could not extract date from file '{args.path}'.")
+            return 1
+        return 0
+    finally:
+        if output not in (None, sys.stdout):
+            output.close()
+        if catalog is not None:
+            catalog.close()
+        if profiler is not None:
+            profiler.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+from datetime import datetime
+
+from logger.logger_manager import Logger
+from .metadata import FileInfo, EXIF_DATE_TAGS
+from .patterns import get_filename_date
+from .files import set_exif_date, set_file_date
+from .inference import DateInference, DEFAULT_MIN_CONFIDENCE
+from .profiling import span
+
+logger = Logger("FDCHANG")
+
+# sources a date can be taken from
+SOURCE_PROVIDED = 'provided'
+SOURCE_EXIF = 'exif'
+SOURCE_JSON = 'json'
+SOURCE_FILENAME = 'filename'
+SOURCE_MTIME = 'mtime'
+SOURCE_INFERRED = 'inferred'
+
+SOURCE_NAMES = {
+    SOURCE_PROVIDED: 'provided date',
+    SOURCE_EXIF: 'EXIF data',
+    SOURCE_JSON: 'JSON file',
+    SOURCE_FILENAME: 'filename',
+    SOURCE_MTIME: 'modification date',
+    SOURCE_INFERRED: 'neighbour files',
+}
+
+# dates from these sources are used to infer the dates of other files
+INFERENCE_SOURCES = (SOURCE_EXIF, SOURCE_JSON, SOURCE_FILENAME)
+
+# files never processed, they are not pictures
+SKIPPED_EXTENSIONS = ('.json',)
+SKIPPED_FILES = ('Thumbs.db',)
+
+
+class Job:
+    """
+    The operations applied to every file of a run.
+
+    Args:
+        sources (tuple): Date sources to try, in order, until one gives a date.
+        set_exif (bool): Write the date to the EXIF data of JPG files.
+        set_mtime (bool): Set the modification date of the file.
+        jpeg_only (bool): Skip the files that are not JPG.
+        exif_tags (tuple): EXIF tags read by the SOURCE_EXIF source.
+        provided_date (datetime): Date used by the SOURCE_PROVIDED source.
+        min_confidence (float): Lowest confidence of the dates given by the
+            SOURCE_INFERRED source.
+    """
+
+    def __init__(self, sources, set_exif=False, set_mtime=True, jpeg_only=False,
+                 exif_tags=EXIF_DATE_TAGS, provided_date=None, min_confidence=DEFAULT_MIN_CONFIDENCE):
+        self.sources = tuple(sources)
+        self.set_exif = set_exif
+        self.set_mtime = set_mtime
+        self.jpeg_only = jpeg_only
+        self.exif_tags = exif_tags
+        self.provided_date = provided_date
+        self.min_confidence = min_confidence
+
+    @property
+    def infers(self) -> bool:
+        """True if some dates are inferred from the neighbour files."""
+        return SOURCE_INFERRED in self.sources
+
+
+class Result:
+    """The outcome of processing one file."""
+
+    def __init__(self, path, date=None, source=None, skipped=False, error=None):
+        self.path = path
+        self.date = date
+        self.source = source
+        self.skipped = skipped
+        self.error = error
+        self.exif_written = False
+        self.mtime_written = False
+        # only set for inferred dates
+        self.confidence = None
+        # True for files waiting for the dates of their neighbours
+        self.deferred = False
+        # metadata of the file as it was before being updated
+        self.info = None
+        # seconds spent on the file, set by the caller
+        self.duration = None
+
+
+def filename_job(infer: bool = False, min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> Job:
+    """Set the modification date from the EXIF data, JSON file or name of the file."""
+    sources = (SOURCE_EXIF, SOURCE_JSON, SOURCE_FILENAME)
+    if infer:
+        sources += (SOURCE_INFERRED,)
+    return Job(sources, min_confidence=min_confidence)
+
+
+def exif_job() -> Job:
+    """Copy the modification date of JPG files into their EXIF data."""
+    return Job((SOURCE_MTIME,), set_exif=True, jpeg_only=True)
+
+
+def normalize_job(provided_date: datetime = None, force_json_date: bool = False,
+                  force_filename_date: bool = False, force_mod_date: bool = False,
+                  infer: bool = False, min_confidence: float = DEFAULT_MIN_CONFIDENCE) -> Job:
+    """
+    Set both the EXIF date and the modification date of JPG files.
+
+    With infer, files with no date in their EXIF data, JSON file or name get
+    one from their neighbours before falling back to the modification date,
+    unless its confidence is below min_confidence.
+    """
+    if provided_date:
+        sources = (SOURCE_PROVIDED,)
+    elif force_json_date:
+        sources = (SOURCE_JSON, SOURCE_FILENAME, SOURCE_MTIME)
+    elif force_filename_date:
+        sources = (SOURCE_FILENAME, SOURCE_MTIME)
+    elif force_mod_date:
+        sources = (SOURCE_MTIME,)
+    else:
+        sources = (SOURCE_EXIF, SOURCE_JSON, SOURCE_FILENAME, SOURCE_MTIME)
+    if infer and SOURCE_MTIME in sources and len(sources) > 1:
+        position = sources.index(SOURCE_MTIME)
+        sources = sources[:position] + (SOURCE_INFERRED,) + sources[position:]
+    return Job(sources, set_exif=True, jpeg_only=True,
+               exif_tags=('DateTimeOriginal',), provided_date=provided_date,
+               min_confidence=min_confidence)
+
+
+def get_date(info: FileInfo, source: str, job: Job, inference: DateInference = None):
+    """
+    Get the date of a file from one source.
+
+    Returns:
+        tuple: The date, None if the source has none, and its confidence,
+            only given for inferred dates.
+    """
+    if source == SOURCE_INFERRED:
+        if inference is None:
+            return None, None
+        return inference.infer(info.path)
+    return _get_date(info, source, job), None
+
+
+def _get_date(info: FileInfo, source: str, job: Job) -> datetime:
+    if source == SOURCE_PROVIDED:
+        return job.provided_date
+    if source == SOURCE_EXIF:
+        # only JPG files are opened to look for EXIF data
+        if not info.is_jpeg:
+            return None
+        return info.exif_date(job.exif_tags)
+    if source == SOURCE_JSON:
+        return info.json_date()
+    if source == SOURCE_FILENAME:
+        return get_filename_date(info.name)
+    if source == SOURCE_MTIME:
+        return info.mtime
+    raise ValueError(f"Unknown date source: {source}")
+
+
+def resolve_date(info: FileInfo, job: Job, inference: DateInference = None, start: int = 0):
+    """
+    Find the date of a file trying the sources of the job in order.
+
+    Args:
+        info (FileInfo): The file.
+        job (Job): The job giving the sources.
+        inference (DateInference): Dates of the other files of the run.
+        start (int): Position in the job sources of the first source to try.
+
+    Returns:
+        tuple: The date, the source it was taken from and the confidence of
+            inferred dates. (None, None, None) if no source gives a date, and
+            (None, SOURCE_INFERRED, None) if the date has to be inferred once
+            all the other files are resolved.
+    """
+    for source in job.sources[start:]:
+        if source == SOURCE_INFERRED and inference is not None and not inference.ready:
+            return None, SOURCE_INFERRED, None
+        date, confidence = get_date(info, source, job, inference)
+        if date:
+            if confidence is None:
+                logger.info(f"Date found in {SOURCE_NAMES[source]} for {info.path}: {date}.")
+            else:
+                logger.info(f"Date found in {SOURCE_NAMES[source]} for {info.path}: {date} "
+                            f"(confidence {confidence:.2f}).")
+            return date, source, confidence
+        logger.info(f"No date found in {SOURCE_NAMES[source]} for {info.path}.")
+    return None, None, None
+
+
+def process_file(file_path: str, job: Job, inference: DateInference = None) -> Result:
+    """
+    Process a file applying all the operations of the job in a single pass.
+
+    The metadata of the file is read once and shared by the date lookup and
+    the EXIF rewrite.
+
+    When the job infers dates and the file needs it, nothing is written yet:
+    the result is returned with deferred set, to be finished by
+    complete_file once the dates of all the other files are known.
+    """
+    info = FileInfo(file_path)
+    if info.name.endswith(SKIPPED_EXTENSIONS) or info.name in SKIPPED_FILES:
+        logger.info(f"Skipping file: {file_path}")
+        return Result(file_path, skipped=True)
+    if job.jpeg_only and not info.is_jpeg:
+        logger.info(f"Skipping non-JPG file: {file_path}")
+        return Result(file_path, skipped=True)
+    return _process(info, job, inference)
+
+
+def complete_file(result: Result, job: Job, inference: DateInference) -> Result:
+    """Finish a deferred file, starting from the inferred date source."""
+    return _process(result.info, job, inference, start=job.sources.index(SOURCE_INFERRED))
+
+
+def _process(info: FileInfo, job: Job, inference: DateInference, start: int = 0) -> Result:
+    file_path = info.path
+    try:
+        date, source, confidence = resolve_date(info, job, inference, start)
+    except OSError as e:
+        logger.error(f"Error reading file '{file_path}': {e}")
+        return Result(file_path, error=str(e))
+    result = Result(file_path, date, source)
+    result.confidence = confidence
+    result.info = info
+    if date is None and source == SOURCE_INFERRED:
+        logger.info(f"Waiting for the dates of the files next to '{file_path}'.")
+        # only the path and stat are kept until the file is finished
+        info.release()
+        result.deferred = True
+        return result
+    if date is None:
+        logger.warning(f"Could not extract date from file '{file_path}'. Skipping...")
+        return result
+
+    try:
+        # keep the size and modification date from before the update
+        info.stat
+    except OSError as e:
+        logger.error(f"Error reading file '{file_path}': {e}")
+        result.error = str(e)
+        return result
+    if inference is not None and source in INFERENCE_SOURCES:
+        inference.add(file_path, date)
+    if job.set_exif and info.is_jpeg:
+        # PIL is only used to read the EXIF data if it can't be patched in place
+        exif_bytes = info.exif_bytes if info.exif_loaded else None
+        with span('exif_write', path=file_path):
+            result.exif_written = set_exif_date(file_path, date, exif_bytes)
+    if job.set_mtime:
+        with span('utime', path=file_path):
+            result.mtime_written = set_file_date(file_path, date)
+    return result
@@ -0,0 +1,250 @@
+"""
+Rewrite the EXIF date tags of a JPG file without re-encoding its metadata.
+
+piexif loads the whole EXIF block, thumbnail and MakerNote included, and
+dumps it again, which fails on some large MakerNotes. Here only the IFD
+holding the date tags is touched:
+
+- When DateTimeOriginal and DateTimeDigitized already exist, their values
+  are overwritten in place in the file, a few bytes at a known offset.
+- Otherwise the Exif IFD is rebuilt with the date tags added and appended
+  to the end of the EXIF block. Its other entries are copied as they are
+  and keep pointing to their original values, and every other IFD, the
+  thumbnail and the MakerNote are left where they were. The rest of the
+  image is moved in the same file, in fixed size blocks.
+
+When the file has no EXIF block, or its structure is not understood,
+patch_exif_dates returns False so that the caller can fall back to piexif.
+"""
+
+import os
+import struct
+from datetime import datetime
+
+from logger.logger_manager import Logger
+
+logger = Logger("FDCHANG")
+
+EXIF_HEADER = b'Exif\x00\x00'
+# largest APP1 segment allowed by JPEG, length field included
+MAX_SEGMENT_LENGTH = 0xFFFF
+
+TAG_EXIF_IFD = 0x8769
+TAG_DATE_TIME_ORIGINAL = 0x9003
+TAG_DATE_TIME_DIGITIZED = 0x9004
+DATE_TAGS = (TAG_DATE_TIME_ORIGINAL, TAG_DATE_TIME_DIGITIZED)
+
+TYPE_ASCII = 2
+# 'YYYY:MM:DD HH:MM:SS' and its NUL terminator
+DATE_LENGTH = 20
+
+COPY_BLOCK_SIZE = 1024 * 1024
+
+
+class ExifStructureError(Exception):
+    """The EXIF block is not laid out as expected."""
+
+
+def find_exif_segment(f):
+    """
+    Find the EXIF APP1 segment of a JPG file, reading only the marker headers.
+
+    Returns:
+        tuple: The offset of the segment marker and the segment length, as
+            written in the file, or None if the file has no EXIF segment.
+    """
+    f.seek(0)
+    if f.read(2) != b'\xff\xd8':
+        return None
+    while True:
+        offset = f.tell()
+        header = f.read(4)
+        if len(header) < 4 or header[0] != 0xFF:
+            return None
+        marker = header[1]
+        # start of scan: the image data follows, there is no metadata after it
+        if marker == 0xDA:
+            return None
+        length = struct.unpack('>H', header[2:])[0]
+        if marker == 0xE1 and f.read(len(EXIF_HEADER)) == EXIF_HEADER:
+            return offset, length
+        f.seek(offset + 2 + length)
+
+
+class TiffReader:
+    """Reads the TIFF structure of an EXIF block directly from the file."""
+
+    def __init__(self, f, tiff_offset: int, tiff_length: int):
+        self.f = f
+        self.tiff_offset = tiff_offset
+        self.tiff_length = tiff_length
+        order = self.read(0, 2)
+        if order == b'II':
+            self.order = '<'
+        elif order == b'MM':
+            self.order = '>'
+        else:
+            raise ExifStructureError(f"unknown byte order {order!r}")
+        if self.unpack('H', 2) != 42:
+            raise ExifStructureError("bad TIFF header")
+
+    def read(self, offset: int, size: int) -> bytes:
+        if offset < 0 or offset + size > self.tiff_length:
+            raise ExifStructureError(f"offset {offset} out of the EXIF block")
+        self.f.seek(self.tiff_offset + offset)
+        data = self.f.read(size)
+        if len(data) != size:
+            raise ExifStructureError("truncated EXIF block")
+        return data
+
+    def unpack(self, fmt: str, offset: int):
+        return struct.unpack(self.order + fmt, self.read(offset, struct.calcsize(fmt)))[0]
+
+    def read_ifd(self, offset: int) -> list:
+        """
+        Read the entries of an IFD.
+
+        Returns:
+            list: (tag, type, count, entry offset, raw entry) for each entry.
+        """
+        count = self.unpack('H', offset)
+        data = self.read(offset + 2, count * 12)
+        entries = []
+        for i in range(count):
+            raw = data[i * 12:(i + 1) * 12]
+            tag, type_, value_count = struct.unpack(self.order + 'HHI', raw[:8])
+            entries.append((tag, type_, value_count, offset + 2 + i * 12, raw))
+        return entries
+
+
+def encode_date(date: datetime) -> bytes:
+    return date.strftime("%Y:%m:%d %H:%M:%S").encode('ascii') + b'\x00'
+
+
+def patch_exif_dates(file_path: str, date: datetime) -> bool:
+    """
+    Set the DateTimeOriginal and DateTimeDigitized tags of a JPG file.
+
+    Args:
+        file_path (str): The path to the image.
+        date (datetime): The date and time to set.
+
+    Returns:
+        bool: True if the tags were written, False if the file has no EXIF
+            block or one that can't be patched, and piexif has to be used.
+    """
+    value = encode_date(date)
+    try:
+        with open(file_path, 'r+b') as f:
+            segment = find_exif_segment(f)
+            if segment is None:
+                return False
+            segment_offset, segment_length = segment
+            # marker, length and 'Exif\0\0' come before the TIFF header
+            tiff_offset = segment_offset + 4 + len(EXIF_HEADER)
+            tiff_length = segment_length - 2 - len(EXIF_HEADER)
+            reader = TiffReader(f, tiff_offset, tiff_length)
+
+            ifd0 = reader.read_ifd(reader.unpack('I', 4))
+            exif_pointer = next((entry for entry in ifd0 if entry[0] == TAG_EXIF_IFD), None)
+            if exif_pointer is None:
+                # adding the Exif IFD means rebuilding IFD0 too
+                return False
+            exif_ifd = reader.read_ifd(reader.unpack('I', exif_pointer[3] + 8))
+
+            patches = []
+            for tag in DATE_TAGS:
+                entry = next((entry for entry in exif_ifd if entry[0] == tag), None)
+                if entry is None or entry[1] != TYPE_ASCII or entry[2] < DATE_LENGTH:
+                    break
+                value_offset = reader.unpack('I', entry[3] + 8)
+                # check the value lies inside the EXIF block before writing it
+                reader.read(value_offset, entry[2])
+                patches.append(tiff_offset + value_offset)
+            else:
+                for offset in patches:
+                    f.seek(offset)
+                    f.write(value)
+                return True
+
+            new_tiff = append_exif_ifd(reader, exif_pointer, exif_ifd, value)
+    except ExifStructureError as e:
+        logger.warning(f"Unexpected EXIF structure in {file_path}: {e}")
+        return False
+
+    replace_segment(file_path, segment_offset, segment_length, new_tiff)
+    return True
+
+
+def append_exif_ifd(reader: TiffReader, exif_pointer, exif_ifd: list, value: bytes) -> bytes:
+    """
+    Build a new TIFF block with a rebuilt Exif IFD appended to the old one.
+
+    Returns:
+        bytes: The new TIFF block.
+    """
+    order = reader.order
+    tiff = bytearray(reader.read(0, reader.tiff_length))
+    # IFDs must start on a word boundary
+    if len(tiff) % 2:
+        tiff += b'\x00'
+    ifd_offset = len(tiff)
+
+    entries = {entry[0]: entry[4] for entry in exif_ifd if entry[0] not in DATE_TAGS}
+    count = len(entries) + len(DATE_TAGS)
+    values_offset = ifd_offset + 2 + count * 12 + 4
+    for i, tag in enumerate(DATE_TAGS):
+        entries[tag] = struct.pack(order + 'HHII', tag, TYPE_ASCII, DATE_LENGTH,
+                                   values_offset + i * DATE_LENGTH)
+
+    ifd = bytearray(struct.pack(order + 'H', count))
+    # the entries of an IFD are sorted by tag
+    for tag in sorted(entries):
+        ifd += entries[tag]
+    ifd += struct.pack(order + 'I', 0)
+    ifd += value * len(DATE_TAGS)
+    tiff += ifd
+
+    # point IFD0 to the new Exif IFD
+    pointer = exif_pointer[3] + 8
+    tiff[pointer:pointer + 4] = struct.pack(order + 'I', ifd_offset)
+
+    if 2 + len(EXIF_HEADER) + len(tiff) > MAX_SEGMENT_LENGTH:
+        raise ExifStructureError("no room left in the EXIF segment")
+    return bytes(tiff)
+
+
+def replace_segment(file_path: str, segment_offset: int, segment_length: int, tiff: bytes) -> None:
+    """
+    Replace the EXIF segment of a file with a new one, in the same file.
+
+    The file keeps its inode, so hard links, owner, extended attributes and
+    ACLs are preserved. The data after the segment is moved by the
+    difference in size a block at a time, starting from the end when the
+    segment grows so that no block is overwritten before it is moved.
+    """
+    segment = b'\xff\xe1' + struct.pack('>H', 2 + len(EXIF_HEADER) + len(tiff)) + EXIF_HEADER + tiff
+    tail_offset = segment_offset + 2 + segment_length
+    shift = segment_offset + len(segment) - tail_offset
+    with open(file_path, 'r+b') as f:
+        size = f.seek(0, os.SEEK_END)
+        if shift > 0:
+            end = size
+            while end > tail_offset:
+                start = max(tail_offset, end - COPY_BLOCK_SIZE)
+                f.seek(start)
+                block = f.read(end - start)
+                f.seek(start + shift)
+                f.write(block)
+                end = start
+        elif shift < 0:
+            start = tail_offset
+            while start < size:
+                f.seek(start)
+                block = f.read(COPY_BLOCK_SIZE)
+                f.seek(start + shift)
+                f.write(block)
+                start += len(block)
+            f.truncate(size + shift)
+        f.seek(segment_offset)
+        f.write(segment)
@@ -0,0 +1,110 @@
+import os
+from datetime import datetime
+
+from logger.logger_manager import Logger
+from .metadata import EXIF_DATE_FORMAT
+from .exif_rewrite import patch_exif_dates
+
+logger = Logger("FDCHANG")
+
+
+# this function gets all the files in the given directory
+def get_files_in_directory(directory):
+    # List to store file names
+    files = []
+
+    # Iterate over all items in the directory
+    for item in os.listdir(directory):
+        # Construct full path
+        full_path = os.path.join(directory, item)
+        # Check if it's a file
+        if os.path.isfile(full_path):
+            files.append(item)
+
+    return files
+
+
+def set_file_date(file_path: str, date: datetime) -> bool:
+    """
+    Sets the modification date and time of a file.
+
+    Args:
+        file_path (str): The path to the file.
+        date (datetime): The date and time to set.
+
+    Returns:
+        bool: True if the date was set.
+    """
+    try:
+        # Convert the datetime object to a timestamp
+        timestamp = date.timestamp()
+
+        # Set the file's modification time
+        os.utime(file_path, (timestamp, timestamp))
+        logger.info(f"File modification date set to {date} for {file_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error setting date for file '{file_path}': {e}")
+        return False
+
+
+def read_exif_bytes(file_path: str) -> bytes:
+    """Read the raw EXIF block of an image with PIL, b'' if it has none."""
+    # PIL is only imported when the EXIF data has to be rebuilt
+    from PIL import Image
+
+    with Image.open(file_path) as img:
+        return img.info.get('exif', b'')
+
+
+def set_exif_date(file_path: str, date: datetime, exif_bytes: bytes = None) -> bool:
+    """
+    Sets the EXIF DateTimeOriginal and DateTimeDigitized tags of an image.
+
+    The tags are patched in the file when possible, leaving the rest of the
+    EXIF data untouched. piexif is only used to rebuild the EXIF data when
+    the image has none, or when it can't be patched.
+
+    Args:
+        file_path (str): The path to the image.
+        date (datetime): The date and time to set.
+        exif_bytes (bytes): The current EXIF block of the image, when the
+            caller has already read it. Otherwise it is only read if the
+            EXIF data has to be rebuilt.
+
+    Returns:
+        bool: True if the EXIF data was written.
+    """
+    # Convert the date to EXIF format
+    exif_date = date.strftime(EXIF_DATE_FORMAT)
+
+    try:
+        if patch_exif_dates(file_path, date):
+            logger.info(f"EXIF DateTimeOriginal and DateTimeDigitized updated to {exif_date} for {file_path}")
+            return True
+    except Exception as e:
+        logger.error(f"Error updating EXIF data: {e}")
+        return False
+
+    from piexif import ExifIFD, load, dump, insert
+
+    try:
+        if exif_bytes is None:
+            exif_bytes = read_exif_bytes(file_path)
+        # Check if the image has EXIF data. if not, create a new one
+        if not exif_bytes:
+            logger.warning(f"No EXIF data found in {file_path}. Creating new EXIF data.")
+            exif_dict = {"0th": {}, "Exif": {}, "GPS": {}, "Interop": {}, "1st": {}}
+        else:
+            exif_dict = load(exif_bytes)
+
+        exif_dict["Exif"][ExifIFD.DateTimeOriginal] = exif_date.encode('utf-8')
+        exif_dict["Exif"][ExifIFD.DateTimeDigitized] = exif_date.encode('utf-8')
+
+        # Save the updated EXIF data back to the image
+        insert(dump(exif_dict), file_path)
+        logger.info(f"EXIF DateTimeOriginal and DateTimeDigitized updated to {exif_date} for {file_path}")
+        return True
+    except Exception as e:
+        logger.error(f"Error updating EXIF data: {e}")
+        return False
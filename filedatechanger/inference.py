@@ -0,0 +1,154 @@
+import os
+import re
+import threading
+from bisect import bisect_left
+from datetime import datetime
+
+from logger.logger_manager import Logger
+
+logger = Logger("FDCHANG")
+
+# sequence numbered names such as 'DSC_0412' or 'IMG1234': a prefix without
+# digits followed by the number, the extension is ignored
+SEQUENCE_PATTERN = re.compile(r'(?P<prefix>\D*)(?P<number>\d+)')
+
+# confidence of a date interpolated between two neighbours, and of a date
+# copied from a neighbour on one side only, when the closest neighbour is
+# adjacent. Both decrease with the distance to the closest neighbour, so a
+# second neighbour only ever raises the confidence.
+CONFIDENCE_BOTH_SIDES = 0.9
+CONFIDENCE_ONE_SIDE = 0.5
+# inferred dates below this confidence are dropped, so that a file far from
+# its dated neighbours falls back to the next source. It keeps dates
+# interpolated up to 3 numbers away from the closest neighbour, or copied
+# from a neighbour up to 2 numbers away.
+DEFAULT_MIN_CONFIDENCE = 0.25
+
+
+def parse_sequence(filename: str):
+    """
+    Split a sequence numbered file name into its prefix and number.
+
+    Returns:
+        tuple: The prefix and the number, (None, None) if the name has no
+            sequence number.
+    """
+    stem = os.path.splitext(filename)[0]
+    match = SEQUENCE_PATTERN.fullmatch(stem)
+    if not match:
+        return None, None
+    return match.group('prefix'), int(match.group('number'))
+
+
+class DirectoryIndex:
+    """
+    Dates already resolved in one directory, by sequence prefix.
+
+    Dates are appended as they are resolved, and each sequence is sorted
+    once, on the first lookup after a change. Lookups then bisect the
+    sorted sequence numbers.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._numbers = {}
+
+    def add(self, prefix: str, number: int, date: datetime) -> None:
+        self._entries.setdefault(prefix, []).append((number, date.timestamp()))
+        # the sorted numbers of this sequence are rebuilt on the next lookup
+        self._numbers.pop(prefix, None)
+
+    def neighbours(self, prefix: str, number: int):
+        """
+        Find the closest resolved entries around a sequence number.
+
+        Returns:
+            tuple: The (number, timestamp) entries below and above, or at,
+                the number. None for a side with no entry.
+        """
+        entries = self._entries.get(prefix)
+        if not entries:
+            return None, None
+        numbers = self._numbers.get(prefix)
+        if numbers is None:
+            entries.sort()
+            numbers = self._numbers[prefix] = [entry[0] for entry in entries]
+        position = bisect_left(numbers, number)
+        if position < len(numbers) and numbers[position] == number:
+            return entries[position], entries[position]
+        below = entries[position - 1] if position > 0 else None
+        above = entries[position] if position < len(entries) else None
+        return below, above
+
+
+class DateInference:
+    """
+    Infer the date of files with no usable source from their neighbours.
+
+    The dates resolved during a run are recorded per directory. A file such
+    as 'DSC_0412.jpg' then gets a date interpolated between the dates of
+    'DSC_0411.jpg' and 'DSC_0413.jpg', with a confidence score between 0
+    and 1. Dates with a confidence below min_confidence are not given.
+    """
+
+    def __init__(self, min_confidence: float = DEFAULT_MIN_CONFIDENCE):
+        self.min_confidence = min_confidence
+        self._directories = {}
+        # files may be resolved by several workers at once
+        self._lock = threading.Lock()
+        # set once all the files of the run have been seen, inference is
+        # only done after that
+        self.ready = False
+
+    def add(self, path: str, date: datetime) -> None:
+        """Record the date resolved for a file."""
+        prefix, number = parse_sequence(os.path.basename(path))
+        if prefix is None:
+            return
+        directory = os.path.dirname(path)
+        with self._lock:
+            index = self._directories.get(directory)
+            if index is None:
+                index = self._directories[directory] = DirectoryIndex()
+            index.add(prefix, number, date)
+
+    def infer(self, path: str):
+        """
+        Infer the date of a file from the dates of its neighbours.
+
+        Returns:
+            tuple: The date and its confidence, (None, None) if the file has
+                no sequence number, no resolved neighbour or the confidence
+                is below min_confidence.
+        """
+        date, confidence = self._infer(path)
+        if date is not None and confidence < self.min_confidence:
+            logger.info(f"Date inferred for {path} dropped, confidence {confidence:.2f} "
+                        f"is below {self.min_confidence:.2f}.")
+            return None, None
+        return date, confidence
+
+    def _infer(self, path: str):
+        prefix, number = parse_sequence(os.path.basename(path))
+        if prefix is None:
+            return None, None
+        index = self._directories.get(os.path.dirname(path))
+        if index is None:
+            return None, None
+        below, above = index.neighbours(prefix, number)
+
+        if below is not None and below is above:
+            # another file with the same sequence number, e.g. a RAW+JPG pair
+            return datetime.fromtimestamp(below[1]), 1.0
+        if below is not None and above is not None and below[1] <= above[1]:
+            span = above[0] - below[0]
+            timestamp = below[1] + (above[1] - below[1]) * (number - below[0]) / span
+            confidence = CONFIDENCE_BOTH_SIDES / min(number - below[0], above[0] - number)
+            return datetime.fromtimestamp(timestamp), confidence
+        # only one neighbour, or the dates go backwards: use the closest one
+        candidates = [entry for entry in (below, above) if entry is not None]
+        if not candidates:
+            return None, None
+        closest = min(candidates, key=lambda entry: abs(entry[0] - number))
+        confidence = CONFIDENCE_ONE_SIDE / abs(closest[0] - number)
+        return datetime.fromtimestamp(closest[1]), confidence
@@ -0,0 +1,153 @@
+import os
+import json
+from datetime import datetime
+
+from logger.logger_manager import Logger
+from .profiling import span
+
+logger = Logger("FDCHANG")
+
+# EXIF tags holding the date the picture was taken, in order of preference
+EXIF_DATE_TAGS = ('DateTimeOriginal', 'DateTimeDigitized', 'DateTime')
+EXIF_DATE_FORMAT = "%Y:%m:%d %H:%M:%S"
+
+JPEG_EXTENSIONS = ('.jpg', '.jpeg')
+
+
+def is_jpeg(file_path: str) -> bool:
+    """Return True if the file has a JPG extension."""
+    return file_path.endswith(JPEG_EXTENSIONS)
+
+
+class FileInfo:
+    """
+    Metadata of a single file.
+
+    Every source (stat, EXIF and the '.json' sidecar) is read from disk at
+    most once, the first time it is needed, and kept for the rest of the run
+    so that several operations on the same file don't read it again.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.basename(path)
+        self._stat = None
+        self._exif_bytes = None
+        self._exif_tags = None
+        self._sidecar = None
+        self._sidecar_read = False
+
+    @property
+    def stat(self) -> os.stat_result:
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
+
+    @property
+    def is_jpeg(self) -> bool:
+        return is_jpeg(self.name)
+
+    @property
+    def mtime(self) -> datetime:
+        """The modification date of the file."""
+        return datetime.fromtimestamp(self.stat.st_mtime)
+
+    @property
+    def exif_bytes(self) -> bytes:
+        """The raw EXIF block of the image, b'' if it has none."""
+        self._read_exif()
+        return self._exif_bytes
+
+    @property
+    def exif_tags(self) -> dict:
+        """The EXIF tags of the image, indexed by tag name."""
+        self._read_exif()
+        return self._exif_tags
+
+    @property
+    def exif_loaded(self) -> bool:
+        """True if the EXIF data has already been read."""
+        return self._exif_tags is not None
+
+    @property
+    def sidecar(self) -> dict:
+        """The content of the associated '.json' file, None if there is none."""
+        if not self._sidecar_read:
+            self._sidecar_read = True
+            self._sidecar = self._read_sidecar()
+        return self._sidecar
+
+    def release(self) -> None:
+        """
+        Drop the cached EXIF data and sidecar, keeping the stat.
+
+        Used for files kept aside until the end of a run, so that memory use
+        doesn't grow with their EXIF blocks. They are read again if needed.
+        """
+        self._exif_bytes = None
+        self._exif_tags = None
+        self._sidecar = None
+        self._sidecar_read = False
+
+    def _read_exif(self) -> None:
+        if self._exif_tags is not None:
+            return
+        self._exif_bytes = b''
+        self._exif_tags = {}
+        if self.stat.st_size == 0:
+            logger.info(f"File '{self.path}' is empty.")
+            return
+        # PIL is only imported when an image is actually opened
+        from PIL import Image
+        from PIL.ExifTags import TAGS
+        try:
+            with span('exif_read', path=self.path), Image.open(self.path) as img:
+                self._exif_bytes = img.info.get('exif', b'')
+                info = img._getexif() if hasattr(img, '_getexif') else None
+        except Exception as e:
+            logger.error(f"Error reading EXIF data: {e}")
+            return
+        if not info:
+            logger.info(f"File '{self.path}' has no EXIF data.")
+            return
+        for tag, value in info.items():
+            self._exif_tags[TAGS.get(tag, tag)] = value
+
+    def _read_sidecar(self) -> dict:
+        json_path = self.path + '.json'
+        if not os.path.isfile(json_path):
+            return None
+        logger.info(f"File '{json_path}' exists.")
+        try:
+            with span('sidecar_read', path=json_path), open(json_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading '{json_path}': {e}")
+            return None
+
+    def exif_date(self, tags=EXIF_DATE_TAGS) -> datetime:
+        """Get the first valid date among the given EXIF tags."""
+        for tag in tags:
+            value = self.exif_tags.get(tag)
+            if not value:
+                continue
+            try:
+                return datetime.strptime(value, EXIF_DATE_FORMAT)
+            except (TypeError, ValueError):
+                logger.warning(f"File '{self.name}' has an invalid {tag} value: {value}")
+        return None
+
+    def json_date(self) -> datetime:
+        """Get the 'photoTakenTime' date from the associated '.json' file."""
+        data = self.sidecar
+        if not isinstance(data, dict):
+            return None
+        if 'photoTakenTime' not in data:
+            logger.warning(f"File '{self.path}.json' has no valid date and time data.")
+            return None
+        logger.info(f"File '{self.path}.json' has 'photoTakenTime' field.")
+        try:
+            return datetime.fromtimestamp(int(data['photoTakenTime']['timestamp']))
+        except (KeyError, TypeError, ValueError, OverflowError, OSError) as e:
+            logger.warning(f"File '{self.path}.json' has an invalid 'photoTakenTime' value: {e!r}")
+            return None
@@ -0,0 +1,56 @@
+import re
+from datetime import datetime
+
+from logger.logger_manager import Logger
+
+logger = Logger("FDCHANG")
+
+# known file name formats, checked in order.
+# each regex uses the named groups Y, m, d and optionally H, M, S
+FILENAME_PATTERNS = [
+    # WhatsApp images 'IMG-YYYYMMDD-WA[0-9]*.jpg'
+    ('IMG-YYYYMMM-WA[0-9]*.jpg',
+     re.compile(r'IMG-(?P<Y>\d{4})(?P<m>\d{2})(?P<d>\d{2})-WA\d+\.jpg')),
+    # WhatsApp images with a suffix 'IMG-YYYYMMDD-WA[0-9]*.*.jpg'
+    ('IMG-YYYYMMM-WA[0-9]*\\.*.jpg',
+     re.compile(r'IMG-(?P<Y>\d{4})(?P<m>\d{2})(?P<d>\d{2})-WA\d+\.*.*\.jpg')),
+    # 'YYYY-MM-DD HH.MM.SS.*.jpg'
+    ('YYYY-MM-DD HH.MM.SS.*.jpg',
+     re.compile(r'(?P<Y>\d{4})-(?P<m>\d{2})-(?P<d>\d{2}) (?P<H>\d{2})\.(?P<M>\d{2})\.(?P<S>\d{2}).*\.jpg')),
+    # camera and phone names 'YYYYMMDD_HHMMSS.*'
+    ('YYYYMMDD_HHMMSS.*',
+     re.compile(r'(?P<Y>\d{4})(?P<m>\d{2})(?P<d>\d{2})_(?P<H>\d{2})(?P<M>\d{2})(?P<S>\d{2}).*')),
+    # WhatsApp videos 'VID-YYYYMMDD-*'
+    ('VID-YYYYMMDD-\\.*.*',
+     re.compile(r'VID-(?P<Y>\d{4})(?P<m>\d{2})(?P<d>\d{2})-\.*.*')),
+    # Android screenshots 'Screenshot_YYYYMMDD-HHMMSS*'
+    ('Screenshot_YYYYMMDD-HHMMSS\\.*.*',
+     re.compile(r'Screenshot_(?P<Y>\d{4})(?P<m>\d{2})(?P<d>\d{2})-(?P<H>\d{2})(?P<M>\d{2})(?P<S>\d{2}).*')),
+]
+
+
+def get_filename_date(filename: str) -> datetime:
+    """
+    Extracts the date and time from a file name.
+
+    Args:
+        filename (str): The base name of the file, e.g. '20240131_154500.jpg'.
+
+    Returns:
+        datetime: The date found in the name, or None if no known format matches.
+    """
+    for description, pattern in FILENAME_PATTERNS:
+        match = pattern.match(filename)
+        if not match:
+            continue
+        logger.info(f"File '{filename}' matchs the regex pattern '{description}'")
+        parts = match.groupdict()
+        try:
+            return datetime(int(parts['Y']), int(parts['m']), int(parts['d']),
+                            int(parts.get('H', 0)), int(parts.get('M', 0)), int(parts.get('S', 0)))
+        except ValueError as e:
+            logger.warning(f"File '{filename}' has an invalid date in its name: {e}")
+            return None
+
+    logger.warning(f"File '{filename}' does not match any known date format.")
+    return None
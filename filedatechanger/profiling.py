@@ -0,0 +1,185 @@
+"""
+Profiling and tracing of a run.
+
+--profile <prefix> runs the processing under cProfile and writes
+<prefix>.pstats. At the same time a sampler thread records the stacks of
+all the threads, workers included, and writes <prefix>.folded in the
+collapsed stack format read by flamegraph.pl, speedscope or inferno.
+cProfile only sees the thread it is enabled in, so with --profile the
+files are processed one at a time in the main thread. --trace keeps the
+workers, and shows how their time is spent.
+
+--trace <file> writes a Chrome trace event JSON file, that can be opened
+in Perfetto or chrome://tracing, with one span per file and one per stage
+inside it (scan, EXIF read, sidecar read, EXIF write, utime).
+
+Both are off by default, and span() does nothing until a trace is started.
+"""
+
+import os
+import sys
+import json
+import time
+import marshal
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+from logger.logger_manager import Logger
+
+logger = Logger("FDCHANG")
+
+SAMPLE_INTERVAL = 0.005
+
+# the active trace, None when not tracing
+_tracer = None
+
+
+class Tracer:
+    """Writes trace events to a file as they end."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'w')
+        self._file.write('[\n')
+        self._first = True
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._threads = set()
+        self._start = time.perf_counter_ns()
+
+    def _write(self, event: dict) -> None:
+        if not self._first:
+            self._file.write(',\n')
+        self._first = False
+        self._file.write(json.dumps(event))
+
+    def add(self, name: str, category: str, start: int, end: int, args: dict) -> None:
+        """Add a complete event, start and end given by time.perf_counter_ns()."""
+        tid = threading.get_ident()
+        with self._lock:
+            if tid not in self._threads:
+                # name the thread in the trace viewer
+                self._threads.add(tid)
+                self._write({'name': 'thread_name', 'ph': 'M', 'pid': self._pid, 'tid': tid,
+                             'args': {'name': threading.current_thread().name}})
+            self._write({'name': name, 'cat': category, 'ph': 'X', 'pid': self._pid, 'tid': tid,
+                         'ts': (start - self._start) / 1000, 'dur': (end - start) / 1000,
+                         'args': args})
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.write('\n]\n')
+            self._file.close()
+
+
+@contextmanager
+def span(name: str, category: str = 'stage', **args):
+    """Record the time spent in a block as a trace event, when tracing."""
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        tracer.add(name, category, start, time.perf_counter_ns(), args)
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of all the other threads at a fixed interval."""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_name(frame))
+                    frame = frame.f_back
+                stack.append(names.get(tid, str(tid)))
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+    def write_folded(self, f) -> None:
+        """Write the samples in collapsed stack format, one stack and its count per line."""
+        for stack, count in self.stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """
+    Profile and/or trace the processing of a run.
+
+    All the output files are opened by start(), so that a bad path is
+    reported before the run begins rather than once it is over.
+
+    Args:
+        prefix (str): Prefix of the .pstats and .folded files, None to not profile.
+        trace_path (str): Trace event file, None to not trace.
+    """
+
+    def __init__(self, prefix: str = None, trace_path: str = None):
+        self.prefix = prefix
+        self.trace_path = trace_path
+        self._profile = None
+        self._sampler = None
+        self._files = []
+
+    def start(self) -> None:
+        """Open the output files and start profiling. Raises OSError if a file can't be opened."""
+        global _tracer
+        try:
+            if self.prefix:
+                self._files = [open(self.prefix + '.pstats', 'wb')]
+                self._files.append(open(self.prefix + '.folded', 'w'))
+            if self.trace_path:
+                _tracer = Tracer(self.trace_path)
+        except OSError:
+            for f in self._files:
+                f.close()
+            self._files = []
+            raise
+        if self.prefix:
+            import cProfile
+
+            self._sampler = StackSampler()
+            self._sampler.start()
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self) -> None:
+        global _tracer
+        if self._profile is not None:
+            self._profile.disable()
+            self._sampler.stop()
+            pstats_file, folded_file = self._files
+            # same content as Profile.dump_stats, read by pstats.Stats
+            self._profile.create_stats()
+            with pstats_file:
+                marshal.dump(self._profile.stats, pstats_file)
+            with folded_file:
+                self._sampler.write_folded(folded_file)
+            self._files = []
+            logger.info(f"Profile written to {self.prefix}.pstats and {self.prefix}.folded")
+        if _tracer is not None:
+            _tracer.close()
+            logger.info(f"Trace written to {_tracer.path}")
+            _tracer = None
@@ -0,0 +1,221 @@
+"""
+Per device scheduling of the files of a run.
+
+Files are grouped by the device they live on and sorted by inode number,
+which follows their position on disk closely enough to avoid most seeks.
+Each device gets its own pool of workers: as many as requested for SSDs,
+and only one or two for rotational disks, where parallel reads make the
+heads seek back and forth. Devices of unknown type, such as network shares
+that often sit on arrays of spinning disks, are treated as rotational.
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from itertools import zip_longest
+from concurrent.futures import ThreadPoolExecutor
+
+from logger.logger_manager import Logger
+
+logger = Logger("FDCHANG")
+
+DEFAULT_WORKERS = os.cpu_count() or 4
+DEFAULT_ROTATIONAL_WORKERS = 1
+# files queued on each device per worker, enough to keep the workers busy
+QUEUE_DEPTH = 4
+# paths read from a stream are sorted in windows of this size, so that
+# memory use stays bounded
+WINDOW_SIZE = 1000
+
+
+def is_rotational(device: int):
+    """
+    Tell if a device is a spinning disk, from /sys/block/*/queue/rotational.
+
+    Returns:
+        bool: True for rotational disks, False for SSDs, None if unknown,
+            e.g. on network shares or outside Linux.
+    """
+    sys_path = f'/sys/dev/block/{os.major(device)}:{os.minor(device)}'
+    try:
+        real_path = os.path.realpath(sys_path)
+    except OSError:
+        return None
+    # partitions have no queue, it belongs to their parent disk
+    for candidate in (real_path, os.path.dirname(real_path)):
+        try:
+            with open(os.path.join(candidate, 'queue', 'rotational')) as f:
+                return f.read().strip() == '1'
+        except OSError:
+            continue
+    return None
+
+
+def scan_directory(directory: str) -> list:
+    """
+    List the files of a directory with their location.
+
+    Returns:
+        list: (path, device, inode) for each file, sorted by inode.
+    """
+    device = os.stat(directory).st_dev
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file():
+                files.append((entry.path, device, entry.inode()))
+    files.sort(key=lambda file: file[2])
+    return files
+
+
+def locate(paths):
+    """Add the device and inode of each path, (path, None, None) when it can't be read."""
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            yield path, None, None
+            continue
+        yield path, stat.st_dev, stat.st_ino
+
+
+def _interleave(files):
+    # unreadable paths first, they are reported without touching the disk
+    groups = {}
+    for file in files:
+        groups.setdefault(file[1], []).append(file)
+    yield from groups.pop(None, [])
+    queues = [sorted(group, key=lambda file: file[2]) for group in groups.values()]
+    # one file of each device in turn, so that every device queue is fed
+    for files_at_position in zip_longest(*queues):
+        for file in files_at_position:
+            if file is not None:
+                yield file
+
+
+def sort_by_device(files, window: int = WINDOW_SIZE):
+    """
+    Group located files by device and sort them by inode, a window at a time.
+
+    Within a window, the files of the different devices are interleaved so
+    that all the devices work at the same time.
+
+    Yields:
+        tuple: (path, device, inode) in the order they should be processed.
+    """
+    pending = []
+    for file in files:
+        pending.append(file)
+        if len(pending) >= window:
+            yield from _interleave(pending)
+            pending = []
+    yield from _interleave(pending)
+
+
+class DeviceScheduler:
+    """
+    Run a function on many files, with a separate worker pool per device.
+
+    Args:
+        workers (int): Workers for SSDs.
+        rotational_workers (int): Workers for spinning disks and devices of
+            unknown type.
+    """
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, rotational_workers: int = DEFAULT_ROTATIONAL_WORKERS):
+        self.workers = max(1, workers)
+        self.rotational_workers = max(1, rotational_workers)
+        self._limits = {}
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    @property
+    def concurrent(self) -> bool:
+        """True if several files can be processed at the same time."""
+        return self.workers > 1 or self.rotational_workers > 1
+
+    def limit(self, device) -> int:
+        """Number of workers allowed on a device."""
+        if device not in self._limits:
+            rotational = is_rotational(device) if device is not None else None
+            limit = self.workers if rotational is False else self.rotational_workers
+            kind = {True: 'rotational', False: 'SSD', None: 'unknown'}[rotational]
+            logger.info(f"Device {device} is {kind}, using {limit} workers.")
+            self._limits[device] = limit
+        return self._limits[device]
+
+    def _executor(self, device) -> ThreadPoolExecutor:
+        with self._lock:
+            executor = self._executors.get(device)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=self.limit(device),
+                                              thread_name_prefix=f'dev{device}')
+                self._executors[device] = executor
+            return executor
+
+    def run(self, files, func):
+        """
+        Call func(path) for each file, in the order given.
+
+        Each device has at most QUEUE_DEPTH files per worker submitted at a
+        time. The files of a busy device wait in its own backlog, so that a
+        slow disk doesn't hold back the others.
+
+        Args:
+            files: Iterable of (path, device, inode), as given by
+                scan_directory or sort_by_device.
+            func: Function processing one path.
+
+        Yields:
+            The values returned by func, in the order they complete.
+        """
+        if not self.concurrent:
+            for path, _, _ in files:
+                yield func(path)
+            return
+
+        completed = queue.SimpleQueue()
+        backlogs = {}
+        submitted = {}
+        running = 0
+        waiting = 0
+
+        def submit(device):
+            nonlocal running, waiting
+            backlog = backlogs[device]
+            depth = self.limit(device) * QUEUE_DEPTH
+            while backlog and submitted[device] < depth:
+                future = self._executor(device).submit(func, backlog.popleft())
+                future.add_done_callback(lambda future, device=device: completed.put((device, future)))
+                submitted[device] += 1
+                running += 1
+                waiting -= 1
+
+        def finish():
+            nonlocal running
+            device, future = completed.get()
+            submitted[device] -= 1
+            running -= 1
+            submit(device)
+            return future.result()
+
+        try:
+            for path, device, _ in files:
+                if device not in backlogs:
+                    backlogs[device] = deque()
+                    submitted[device] = 0
+                backlogs[device].append(path)
+                waiting += 1
+                submit(device)
+                # bound the number of files waiting, so that a long stream of
+                # paths is not read into memory ahead of the workers
+                while not completed.empty() or waiting >= WINDOW_SIZE:
+                    yield finish()
+            while running:
+                yield finish()
+        finally:
+            backlogs.clear()
+            for executor in self._executors.values():
+                executor.shutdown(wait=True, cancel_futures=True)
+            self._executors = {}
@@ -0,0 +1,85 @@
+"""
+Cold start regression check.
+
+Runs a filename-only invocation under 'python -X importtime' and fails if
+it imports one of the heavy dependencies, or if the imports take longer
+than the budget:
+
+    python -m filedatechanger.startup_check [--budget-ms 150]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+# modules that must not be loaded when only file names are used
+HEAVY_MODULES = ('PIL', 'piexif', 'enlighten')
+DEFAULT_BUDGET_MS = 150
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Parse the '-X importtime' output.
+
+    Returns:
+        dict: The self import time of each module, in microseconds.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            # header line
+            continue
+        modules[fields[2].strip()] = int(fields[0])
+    return modules
+
+
+def measure(file_name: str = '20240131_154500.mp4') -> dict:
+    """Run a filename-only invocation on an empty file and return its imports."""
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, file_name)
+        open(file_path, 'w').close()
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'filedatechanger', 'filename', file_path],
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"filename run failed with exit code {completed.returncode}")
+    return parse_importtime(completed.stderr)
+
+
+def heavy_imports(modules: dict) -> list:
+    """The heavy modules, and their submodules, found among the imports."""
+    return sorted(name for name in modules if name.split('.')[0] in HEAVY_MODULES)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='filedatechanger.startup_check',
+                                     description='Check the cold start of a filename-only run.')
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Maximum total import time in milliseconds (default {DEFAULT_BUDGET_MS})')
+    args = parser.parse_args(argv)
+
+    modules = measure()
+    total_ms = sum(modules.values()) / 1000
+    heavy = heavy_imports(modules)
+
+    failed = False
+    if heavy:
+        print(f"FAIL: heavy modules imported: {', '.join(heavy)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"FAIL: imports took {total_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print(f"OK: imports took {total_ms:.1f} ms, budget is {args.budget_ms:.1f} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
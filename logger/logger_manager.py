@@ -1,9 +1,21 @@
-import colorlog
 import sys
 
+# stream every log handler writes to, stdout unless set_log_stream is called
+_log_stream = None
+_handlers = []
+
+def set_log_stream(stream):
+    """Send the messages of all the loggers, existing and future, to another stream."""
+    global _log_stream
+    _log_stream = stream
+    for handler in _handlers:
+        handler.setStream(stream)
+
 class Logger:
     def __init__(self, name, show_date=True):
     
+        self.name = name
+
         if show_date:
             self.datefmt='%Y-%m-%d %H:%M:%S'
             self.log_format = '%(log_color)s%(asctime)s - %(name)s - %(levelname)s - %(message)s'
@@ -11,8 +23,6 @@ class Logger:
             self.datefmt=''
             self.log_format = '%(message)s'
 
-        self.logger = colorlog.getLogger(name)
-
         self.log_colors = {
             'DEBUG': 'light_black',
             'INFO': 'white',
@@ -22,8 +32,23 @@ class Logger:
             'MESSAGE' : 'green'
         }
 
+        # colorlog is imported and configured on the first message, so that
+        # importing a module that only declares a logger stays cheap
+        self._logger = None
+
+    @property
+    def logger(self):
+        if self._logger is None:
+            self._logger = self._create_logger()
+        return self._logger
+
+    def _create_logger(self):
+        import colorlog
+
+        logger = colorlog.getLogger(self.name)
+
         # Configuration for the logs manager with color
-        handler = colorlog.StreamHandler(sys.stdout)
+        handler = colorlog.StreamHandler(_log_stream or sys.stdout)
 
         # Formatter with colorconfiguration and adding a timestamp
         color_formatter = colorlog.ColoredFormatter(
@@ -33,8 +58,13 @@ class Logger:
         )
 
         handler.setFormatter(color_formatter)
-        self.logger.addHandler(handler)
-        self.logger.setLevel(colorlog.DEBUG)
+        # the same named logger can be requested from several modules,
+        # only the first one attaches a handler
+        if not logger.handlers:
+            logger.addHandler(handler)
+            _handlers.append(handler)
+        logger.setLevel(colorlog.DEBUG)
+        return logger
 
     def debug(self, message, flush=True):
         self.logger.debug(message)
@@ -69,4 +99,4 @@ class Logger:
     def flush(self):
         """We want the logger print message inmediately"""
         for handler in self.logger.handlers:
-            handler.flush()
\ No newline at end of file
+            handler.flush()
@@ -0,0 +1,135 @@
+import os
+import io
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime
+
+try:
+    import piexif
+    from PIL import Image
+except ImportError:
+    piexif = None
+
+from filedatechanger import exif_rewrite
+from filedatechanger.exif_rewrite import patch_exif_dates, find_exif_segment
+from filedatechanger.files import set_exif_date
+
+OLD_DATE = b'2001:02:03 04:05:06'
+NEW_DATE = datetime(2023, 7, 14, 18, 30, 5)
+MAKER_NOTE = bytes(range(256)) * 4
+
+
+def jpeg_bytes(size) -> bytes:
+    buffer = io.BytesIO()
+    Image.new('RGB', size, (200, 120, 40)).save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@unittest.skipIf(piexif is None, "piexif and Pillow are needed to build the test images")
+class PatchExifDatesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'picture.jpg')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_image(self, with_dates: bool) -> None:
+        exif = {piexif.ExifIFD.MakerNote: MAKER_NOTE}
+        if with_dates:
+            exif[piexif.ExifIFD.DateTimeOriginal] = OLD_DATE
+            exif[piexif.ExifIFD.DateTimeDigitized] = OLD_DATE
+        exif_dict = {
+            '0th': {piexif.ImageIFD.Make: b'Camera'},
+            'Exif': exif,
+            'GPS': {},
+            'Interop': {},
+            '1st': {piexif.ImageIFD.JPEGInterchangeFormat: 0,
+                    piexif.ImageIFD.JPEGInterchangeFormatLength: 0},
+            'thumbnail': jpeg_bytes((16, 12)),
+        }
+        with open(self.path, 'wb') as f:
+            f.write(jpeg_bytes((64, 48)))
+        piexif.insert(piexif.dump(exif_dict), self.path)
+
+    def read(self) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def image_data(self) -> bytes:
+        """The file after the EXIF segment."""
+        with open(self.path, 'rb') as f:
+            offset, length = find_exif_segment(f)
+            f.seek(offset + 2 + length)
+            return f.read()
+
+    def assert_patched(self, before: dict) -> None:
+        after = piexif.load(self.path)
+        expected = NEW_DATE.strftime('%Y:%m:%d %H:%M:%S').encode('ascii')
+        self.assertEqual(after['Exif'][piexif.ExifIFD.DateTimeOriginal], expected)
+        self.assertEqual(after['Exif'][piexif.ExifIFD.DateTimeDigitized], expected)
+        self.assertEqual(after['Exif'][piexif.ExifIFD.MakerNote], before['Exif'][piexif.ExifIFD.MakerNote])
+        self.assertEqual(after['thumbnail'], before['thumbnail'])
+        # the pointer to the Exif IFD moves when the IFD is appended
+        self.assertEqual(after['0th'][piexif.ImageIFD.Make], before['0th'][piexif.ImageIFD.Make])
+
+    def test_dates_overwritten_in_place(self):
+        self.write_image(with_dates=True)
+        before = piexif.load(self.path)
+        original = self.read()
+
+        self.assertTrue(patch_exif_dates(self.path, NEW_DATE))
+
+        self.assert_patched(before)
+        patched = self.read()
+        self.assertEqual(len(patched), len(original))
+        # only the two date values change
+        changed = sum(a != b for a, b in zip(original, patched))
+        self.assertLessEqual(changed, 2 * len(OLD_DATE))
+
+    def test_exif_ifd_appended(self):
+        self.write_image(with_dates=False)
+        before = piexif.load(self.path)
+        image_data = self.image_data()
+
+        self.assertTrue(patch_exif_dates(self.path, NEW_DATE))
+
+        self.assert_patched(before)
+        self.assertEqual(self.image_data(), image_data)
+        with Image.open(self.path) as img:
+            img.load()
+
+    def test_exif_ifd_appended_in_same_file(self):
+        self.write_image(with_dates=False)
+        link = os.path.join(self.directory, 'link.jpg')
+        os.link(self.path, link)
+        inode = os.stat(self.path).st_ino
+        before = piexif.load(self.path)
+        image_data = self.image_data()
+
+        # small blocks, so that the image data is moved in several steps
+        with mock.patch.object(exif_rewrite, 'COPY_BLOCK_SIZE', 7):
+            self.assertTrue(patch_exif_dates(self.path, NEW_DATE))
+
+        self.assertEqual(os.stat(self.path).st_ino, inode)
+        self.assertEqual(self.image_data(), image_data)
+        self.path = link
+        self.assert_patched(before)
+
+    def test_no_exif_falls_back_to_piexif(self):
+        with open(self.path, 'wb') as f:
+            f.write(jpeg_bytes((64, 48)))
+
+        self.assertFalse(patch_exif_dates(self.path, NEW_DATE))
+        self.assertTrue(set_exif_date(self.path, NEW_DATE))
+
+        after = piexif.load(self.path)
+        expected = NEW_DATE.strftime('%Y:%m:%d %H:%M:%S').encode('ascii')
+        self.assertEqual(after['Exif'][piexif.ExifIFD.DateTimeOriginal], expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
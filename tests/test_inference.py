@@ -0,0 +1,94 @@
+import os
+import unittest
+from datetime import datetime, timedelta
+
+from filedatechanger.inference import DateInference, parse_sequence
+
+DIRECTORY = os.path.join('photos', 'trip')
+START = datetime(2024, 5, 1, 10, 0, 0)
+
+
+def path(name: str) -> str:
+    return os.path.join(DIRECTORY, name)
+
+
+class ParseSequenceTest(unittest.TestCase):
+
+    def test_sequence_names(self):
+        self.assertEqual(parse_sequence('DSC_0412.JPG'), ('DSC_', 412))
+        self.assertEqual(parse_sequence('IMG1234.jpg'), ('IMG', 1234))
+        self.assertEqual(parse_sequence('holidays.jpg'), (None, None))
+
+
+class DateInferenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.inference = DateInference()
+
+    def add(self, number: int, minutes: int, prefix: str = 'DSC_') -> None:
+        self.inference.add(path(f'{prefix}{number:04d}.jpg'), START + timedelta(minutes=minutes))
+
+    def infer(self, number: int, prefix: str = 'DSC_'):
+        return self.inference.infer(path(f'{prefix}{number:04d}.jpg'))
+
+    def test_interpolated_between_adjacent_neighbours(self):
+        self.add(411, 0)
+        self.add(413, 10)
+        date, confidence = self.infer(412)
+        self.assertEqual(date, START + timedelta(minutes=5))
+        self.assertAlmostEqual(confidence, 0.9)
+
+    def test_same_number(self):
+        self.add(412, 3)
+        self.assertEqual(self.infer(412), (START + timedelta(minutes=3), 1.0))
+
+    def test_one_side(self):
+        self.add(10, 0)
+        date, confidence = self.infer(11)
+        self.assertEqual(date, START)
+        self.assertAlmostEqual(confidence, 0.5)
+        self.assertAlmostEqual(self.infer(12)[1], 0.25)
+        self.assertEqual(self.infer(13), (None, None))
+
+    def test_second_neighbour_never_lowers_confidence(self):
+        self.add(10, 0)
+        one_side = [self.infer(number)[1] for number in (11, 12)]
+        self.add(20, 100)
+        for number, confidence in zip((11, 12), one_side):
+            self.assertGreaterEqual(self.infer(number)[1], confidence)
+        date, confidence = self.infer(11)
+        self.assertEqual(date, START + timedelta(minutes=10))
+        self.assertAlmostEqual(confidence, 0.9)
+
+    def test_far_from_both_neighbours_dropped(self):
+        self.add(10, 0)
+        self.add(20, 100)
+        self.assertEqual(self.infer(15), (None, None))
+        self.inference.min_confidence = 0
+        date, confidence = self.infer(15)
+        self.assertEqual(date, START + timedelta(minutes=50))
+        self.assertAlmostEqual(confidence, 0.18)
+
+    def test_min_confidence(self):
+        inference = DateInference(min_confidence=0.6)
+        inference.add(path('DSC_0010.jpg'), START)
+        self.assertEqual(inference.infer(path('DSC_0011.jpg')), (None, None))
+        inference = DateInference(min_confidence=0)
+        inference.add(path('DSC_0010.jpg'), START)
+        self.assertEqual(inference.infer(path('DSC_0015.jpg')), (START, 0.1))
+
+    def test_dates_going_backwards_use_closest(self):
+        self.add(10, 50)
+        self.add(13, 0)
+        self.assertEqual(self.infer(12), (START, 0.5))
+
+    def test_other_sequence_or_directory_ignored(self):
+        self.add(10, 0, prefix='IMG_')
+        self.assertEqual(self.infer(11), (None, None))
+        self.inference.add(os.path.join('other', 'DSC_0010.jpg'), START)
+        self.assertEqual(self.infer(11), (None, None))
+        self.assertEqual(self.inference.infer(path('holidays.jpg')), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
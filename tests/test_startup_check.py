@@ -0,0 +1,40 @@
+import unittest
+
+from filedatechanger.startup_check import measure, parse_importtime, heavy_imports, DEFAULT_BUDGET_MS
+
+IMPORTTIME_OUTPUT = '''\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      2500 |       2600 | PIL
+import time:       300 |        300 |   PIL.ExifTags
+'''
+
+
+class ParseImporttimeTest(unittest.TestCase):
+
+    def test_self_times(self):
+        modules = parse_importtime(IMPORTTIME_OUTPUT + 'unrelated line\n')
+        self.assertEqual(modules, {'_io': 120, 'PIL': 2500, 'PIL.ExifTags': 300})
+
+    def test_heavy_imports(self):
+        modules = parse_importtime(IMPORTTIME_OUTPUT)
+        self.assertEqual(heavy_imports(modules), ['PIL', 'PIL.ExifTags'])
+
+
+class ColdStartTest(unittest.TestCase):
+
+    def test_filename_run_imports(self):
+        modules = measure()
+        self.assertEqual(heavy_imports(modules), [])
+        # the check is timing based, the fastest of a few runs is kept to
+        # not fail on a busy machine
+        total_ms = sum(modules.values()) / 1000
+        for _ in range(2):
+            if total_ms <= DEFAULT_BUDGET_MS:
+                break
+            total_ms = min(total_ms, sum(measure().values()) / 1000)
+        self.assertLessEqual(total_ms, DEFAULT_BUDGET_MS)
+
+
+if __name__ == '__main__':
+    unittest.main()